@@ -1,23 +1,74 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import case, cast, delete, event, func, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.orm import Session, load_only, raiseload, selectinload
 from datetime import datetime
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import orjson
 import os
+import threading
 import pandas as pd
 from prophet import Prophet
 
+class OrjsonProvider(JSONProvider):
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.option), mimetype="application/json")
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_ALGORITHM_STREAMING"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 1024
+Compress(app)
+
 DB_DIR = "/database"
 os.makedirs(DB_DIR, exist_ok=True)
 DB_PATH = os.path.join(DB_DIR, "grocery.db")
 
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "poolclass": QueuePool,
+    "pool_size": 5,
+    "max_overflow": 10,
+    "connect_args": {"check_same_thread": False, "timeout": 30}
+}
+
+CACHE_TTL = 5
+STREAM_BATCH = 500
+FOOD_CACHE_SIZE = 4096
+ETAG_CACHE_SIZE = 8
 
 db = SQLAlchemy(app)
 
+food_cache = OrderedDict()
+food_cache_lock = threading.Lock()
+
+def compile_serializer(fields):
+    body = ", ".join(f"{key!r}: {expr}" for key, expr in fields.items())
+    namespace = {}
+    exec(f"def to_dict(obj):\n    return {{{body}}}\n", namespace)
+    return namespace["to_dict"]
+
 class Grocery(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), unique=True, nullable=False)
@@ -25,16 +76,18 @@ class Grocery(db.Model):
     threshold = db.Column(db.Integer, default=0)
     unit_cost = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    to_dict = compile_serializer({
+        "id": "obj.id",
+        "name": "obj.name",
+        "stock": "obj.stock",
+        "threshold": "obj.threshold",
+        "unit_cost": "obj.unit_cost",
+        "created_at": "obj.created_at"
+    })
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "stock": self.stock,
-            "threshold": self.threshold,
-            "unit_cost": self.unit_cost,
-            "created_at": self.created_at.isoformat()
-        }
+db.Index("ix_grocery_low_expr", Grocery.stock - Grocery.threshold)
 
 class StockMovement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -42,67 +95,272 @@ class StockMovement(db.Model):
     change = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "grocery_id": self.grocery_id,
-            "change": self.change,
-            "created_at": self.created_at.isoformat()
-        }
+    to_dict = compile_serializer({
+        "id": "obj.id",
+        "grocery_id": "obj.grocery_id",
+        "change": "obj.change",
+        "created_at": "obj.created_at"
+    })
 
 class Food(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), unique=True, nullable=False)
     selling_price = db.Column(db.Float, default=0.0)
     cost_price = db.Column(db.Float, default=0.0)
+    profit = db.Column(db.Float, default=0.0)
+    margin_percent = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    recipes = db.relationship("FoodRecipe", back_populates="food", passive_deletes=True)
+
+    serialize = compile_serializer({
+        "id": "obj.id",
+        "name": "obj.name",
+        "selling_price": "obj.selling_price",
+        "cost_price": "obj.cost_price",
+        "profit": "obj.profit",
+        "margin_percent": "obj.margin_percent",
+        "created_at": "obj.created_at"
+    })
 
-    def to_dict(self, include_groceries=False):
-        d = {
-            "id": self.id,
-            "name": self.name,
-            "selling_price": self.selling_price,
-            "cost_price": self.cost_price,
-            "profit": self.selling_price - self.cost_price,
-            "margin_percent": ((self.selling_price - self.cost_price) / self.selling_price * 100) if self.selling_price else 0,
-            "created_at": self.created_at.isoformat()
-        }
-        if include_groceries:
-            recs = FoodRecipe.query.filter_by(food_id=self.id).all()
-            d["groceries"] = [
-                {
-                    "grocery_id": r.grocery_id,
-                    "grocery_name": r.grocery.name if r.grocery else None,
-                    "quantity": r.quantity,
-                    "unit_cost": r.grocery.unit_cost if r.grocery else 0,
-                    "line_cost": r.quantity * (r.grocery.unit_cost if r.grocery else 0)
-                }
-                for r in recs
-            ]
-        return d
+    def to_dict(self, include_groceries=False, evict=True):
+        if not include_groceries:
+            return self.serialize()
+        return cached_food_dict(self, lambda: [r.to_dict() for r in self.recipes], evict)
 
 class FoodRecipe(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    food_id = db.Column(db.Integer, db.ForeignKey("food.id"), nullable=False)
+    food_id = db.Column(db.Integer, db.ForeignKey("food.id"), nullable=False, index=True)
     grocery_id = db.Column(db.Integer, db.ForeignKey("grocery.id"), nullable=False)
     quantity = db.Column(db.Float, nullable=False, default=0.0)
-    grocery = db.relationship("Grocery", lazy="joined")
+    food = db.relationship("Food", back_populates="recipes")
+    grocery = db.relationship("Grocery")
+
+    to_dict = compile_serializer({
+        "grocery_id": "obj.grocery_id",
+        "grocery_name": "obj.grocery.name if obj.grocery else None",
+        "quantity": "obj.quantity",
+        "unit_cost": "obj.grocery.unit_cost if obj.grocery else 0",
+        "line_cost": "obj.quantity * (obj.grocery.unit_cost if obj.grocery else 0)"
+    })
+
+def set_sqlite_pragmas(dbapi_conn, _):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.close()
+
+GROCERY_COLUMNS = (
+    Grocery.id,
+    Grocery.name,
+    Grocery.stock,
+    Grocery.threshold,
+    cast(Grocery.unit_cost, db.Float).label("unit_cost"),
+    Grocery.created_at
+)
+
+GROCERY_LOAD_ONLY = load_only(
+    Grocery.id,
+    Grocery.name,
+    Grocery.stock,
+    Grocery.threshold,
+    Grocery.unit_cost,
+    Grocery.created_at
+)
+
+FOOD_COLUMNS = (
+    Food.id,
+    Food.name,
+    Food.selling_price,
+    Food.cost_price,
+    Food.profit,
+    Food.margin_percent,
+    Food.created_at,
+    Food.version
+)
+
+RECIPE_LINES = select(
+    FoodRecipe.grocery_id,
+    Grocery.name.label("grocery_name"),
+    FoodRecipe.quantity,
+    func.coalesce(Grocery.unit_cost, 0).label("unit_cost"),
+    (FoodRecipe.quantity * func.coalesce(Grocery.unit_cost, 0)).label("line_cost")
+).outerjoin(Grocery, Grocery.id == FoodRecipe.grocery_id)
+
+def cached_food_dict(food, recipe_lines, evict=True):
+    # Full scans pass evict=False so a catalogue larger than the cache
+    # doesn't cycle every entry out before it is read again.
+    key = (food.version, food.created_at)
+    with food_cache_lock:
+        cached = food_cache.get(food.id)
+        if cached and cached[0] == key:
+            food_cache.move_to_end(food.id)
+            return cached[1]
+    d = Food.serialize(food)
+    d["groceries"] = recipe_lines()
+    with food_cache_lock:
+        if not evict and food.id not in food_cache and len(food_cache) >= FOOD_CACHE_SIZE:
+            return d
+        food_cache[food.id] = (key, d)
+        food_cache.move_to_end(food.id)
+        while len(food_cache) > FOOD_CACHE_SIZE:
+            food_cache.popitem(last=False)
+    return d
+
+def load_food_dict(food_id):
+    food = db.session.execute(select(*FOOD_COLUMNS).where(Food.id == food_id)).first()
+    if not food:
+        return None
+
+    def recipe_lines():
+        return [r._asdict() for r in db.session.execute(RECIPE_LINES.where(FoodRecipe.food_id == food_id))]
+    return cached_food_dict(food, recipe_lines)
+
+SCHEMA_UPGRADES = [
+    ("grocery", "updated_at", "DATETIME", "UPDATE grocery SET updated_at = created_at WHERE updated_at IS NULL"),
+    ("food", "version", "INTEGER NOT NULL DEFAULT 0", None),
+    ("food", "profit", "FLOAT", "UPDATE food SET profit = selling_price - cost_price WHERE profit IS NULL"),
+    (
+        "food",
+        "margin_percent",
+        "FLOAT",
+        "UPDATE food SET margin_percent = CASE WHEN selling_price != 0 "
+        "THEN (selling_price - cost_price) / selling_price * 100 ELSE 0 END "
+        "WHERE margin_percent IS NULL"
+    )
+]
+
+def upgrade_schema():
+    with db.engine.begin() as conn:
+        for table, column, ddl, backfill in SCHEMA_UPGRADES:
+            if column in {c["name"] for c in inspect(conn).get_columns(table)}:
+                continue
+            try:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+            except OperationalError as e:
+                if "duplicate column" not in str(e):
+                    raise
+                continue
+            if backfill:
+                conn.exec_driver_sql(backfill)
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
 
 with app.app_context():
+    event.listen(db.engine, "connect", set_sqlite_pragmas)
     db.create_all()
+    upgrade_schema()
 
 def compute_food_cost(food_id):
-    recs = FoodRecipe.query.filter_by(food_id=food_id).all()
-    total = 0.0
-    for r in recs:
-        if r.grocery and r.grocery.unit_cost:
-            total += r.quantity * r.grocery.unit_cost
-    food = Food.query.get(food_id)
-    if food:
-        food.cost_price = total
-        db.session.commit()
+    total = db.session.execute(
+        select(func.coalesce(func.sum(FoodRecipe.quantity * Grocery.unit_cost), 0.0))
+        .select_from(FoodRecipe)
+        .join(Grocery, Grocery.id == FoodRecipe.grocery_id)
+        .where(FoodRecipe.food_id == food_id)
+    ).scalar()
+    profit = Food.selling_price - total
+    db.session.execute(
+        update(Food)
+        .where(Food.id == food_id)
+        .values(
+            cost_price=total,
+            profit=profit,
+            margin_percent=case((Food.selling_price != 0, profit / Food.selling_price * 100), else_=0),
+            version=Food.version + 1
+        )
+    )
     return total
 
+def bump_food_versions(grocery_id):
+    used_by = select(FoodRecipe.food_id).where(FoodRecipe.grocery_id == grocery_id)
+    db.session.execute(update(Food).where(Food.id.in_(used_by)).values(version=Food.version + 1))
+
+def recipe_rows(food_id, items):
+    wanted = [(int(i.get("grocery_id") or i.get("id")), float(i.get("quantity", 0.0))) for i in items]
+    wanted = [(g_id, qty) for g_id, qty in wanted if qty > 0]
+    if not wanted:
+        return []
+    existing = set(db.session.scalars(select(Grocery.id).where(Grocery.id.in_({g_id for g_id, _ in wanted}))))
+    return [{"food_id": food_id, "grocery_id": g_id, "quantity": qty} for g_id, qty in wanted if g_id in existing]
+
+def grocery_version():
+    return tuple(db.session.execute(select(func.count(Grocery.id), func.max(Grocery.updated_at))).one())
+
+def etag_cached(view):
+    bodies = OrderedDict()
+    lock = threading.Lock()
+
+    @wraps(view)
+    def wrapper():
+        key = (request.full_path, grocery_version())
+        etag = hashlib.blake2b(f"{key[0]}:{key[1]}".encode()).hexdigest()
+        with lock:
+            body = bodies.get(key)
+        if_none_match = request.if_none_match
+        if if_none_match.star_tag or etag in {
+            tag.partition(":")[0] for tag in if_none_match.as_set(include_weak=True)
+        }:
+            response = app.response_class(status=304)
+        elif body is not None:
+            response = app.response_class(body, mimetype="application/json")
+        else:
+            response = app.make_response(view())
+            if not response.is_streamed:
+                with lock:
+                    bodies[key] = response.get_data()
+                    while len(bodies) > ETAG_CACHE_SIZE:
+                        bodies.popitem(last=False)
+        response.set_etag(etag)
+        response.cache_control.max_age = CACHE_TTL
+        return response
+    return wrapper
+
+def stream_json_list(stmt, serialize, head=None, tail=b""):
+    engine = db.engine
+    option = app.json.option
+
+    def generate():
+        with Session(engine) as session:
+            session.connection().exec_driver_sql("BEGIN")
+            prefix = (head(session) if head else b"") + b"["
+            partitions = session.scalars(stmt.execution_options(yield_per=STREAM_BATCH)).partitions()
+            yield prefix
+            sep = b""
+            for rows in partitions:
+                yield sep + orjson.dumps([serialize(r) for r in rows], option=option)[1:-1]
+                sep = b","
+        yield b"]" + tail
+
+    chunks = generate()
+    first = next(chunks)
+
+    def stream():
+        try:
+            yield first
+            yield from chunks
+        finally:
+            chunks.close()
+    return app.response_class(stream(), mimetype="application/json")
+
+def grocery_summary(session):
+    total_items, total_stock, low_items = session.execute(
+        select(
+            func.count(Grocery.id),
+            func.coalesce(func.sum(Grocery.stock), 0),
+            func.coalesce(func.sum(case((Grocery.stock < Grocery.threshold, 1), else_=0)), 0),
+        ).select_from(Grocery)
+    ).one()
+    return {
+        "total_items": total_items,
+        "total_stock": total_stock,
+        "low_items": low_items,
+        "in_stock": total_items - low_items
+    }
+
 @app.route("/grocery", methods=["POST"])
 def create_grocery():
     data = request.json or {}
@@ -112,97 +370,128 @@ def create_grocery():
     unit_cost = float(data.get("unit_cost", 0.0))
     if not name:
         return jsonify({"error": "Name required"}), 400
-    if Grocery.query.filter_by(name=name).first():
+    try:
+        with db.session.begin():
+            g = Grocery(name=name, threshold=threshold, stock=stock, unit_cost=unit_cost)
+            db.session.add(g)
+    except IntegrityError:
         return jsonify({"error": "Grocery exists"}), 400
-    g = Grocery(name=name, threshold=threshold, stock=stock, unit_cost=unit_cost)
-    db.session.add(g)
-    db.session.commit()
     return jsonify({"message": "Created", "data": g.to_dict()}), 201
 
 @app.route("/groceries", methods=["GET"])
+@etag_cached
 def list_groceries():
-    groceries = Grocery.query.order_by(Grocery.created_at.desc()).all()
-    return jsonify([g.to_dict() for g in groceries])
+    groceries = select(Grocery).options(GROCERY_LOAD_ONLY).order_by(Grocery.created_at.desc())
+    return stream_json_list(groceries, Grocery.to_dict)
 
 @app.route("/grocery/<int:g_id>", methods=["GET"])
 def get_grocery(g_id):
-    g = Grocery.query.get(g_id)
+    g = db.session.execute(select(*GROCERY_COLUMNS).where(Grocery.id == g_id)).first()
     if not g:
         return jsonify({"error": "Not found"}), 404
-    return jsonify(g.to_dict())
+    return jsonify(Grocery.to_dict(g))
 
 @app.route("/grocery/<int:g_id>", methods=["PUT"])
 def update_grocery(g_id):
-    g = Grocery.query.get(g_id)
-    if not g:
-        return jsonify({"error": "Not found"}), 404
-    data = request.json or {}
-    if "name" in data:
-        new_name = data["name"].strip()
-        if new_name != g.name:
-            if Grocery.query.filter_by(name=new_name).first():
-                return jsonify({"error": "Name exists"}), 400
-            g.name = new_name
-    if "threshold" in data:
-        g.threshold = int(data["threshold"])
-    if "stock" in data:
-        g.stock = max(0, int(data["stock"]))
-    if "unit_cost" in data:
-        g.unit_cost = float(data["unit_cost"])
-    db.session.commit()
+    try:
+        with db.session.begin():
+            g = Grocery.query.get(g_id)
+            if not g:
+                return jsonify({"error": "Not found"}), 404
+            data = request.json or {}
+            before = (g.name, g.unit_cost)
+            if "name" in data:
+                g.name = data["name"].strip()
+            if "threshold" in data:
+                g.threshold = int(data["threshold"])
+            if "stock" in data:
+                g.stock = max(0, int(data["stock"]))
+            if "unit_cost" in data:
+                g.unit_cost = float(data["unit_cost"])
+            if (g.name, g.unit_cost) != before:
+                bump_food_versions(g.id)
+    except IntegrityError:
+        return jsonify({"error": "Name exists"}), 400
     return jsonify({"message": "Updated", "data": g.to_dict()})
 
 @app.route("/grocery/<int:g_id>", methods=["DELETE"])
 def delete_grocery(g_id):
-    g = Grocery.query.get(g_id)
-    if not g:
-        return jsonify({"error": "Not found"}), 404
-    db.session.delete(g)
-    db.session.commit()
+    with db.session.begin():
+        g = Grocery.query.get(g_id)
+        if not g:
+            return jsonify({"error": "Not found"}), 404
+        bump_food_versions(g.id)
+        db.session.delete(g)
     return jsonify({"message": "Deleted"})
 
 @app.route("/grocery/<int:g_id>/add", methods=["POST"])
 def add_stock(g_id):
-    g = Grocery.query.get(g_id)
-    if not g:
-        return jsonify({"error": "Not found"}), 404
     qty = int((request.json or {}).get("qty", 0))
     if qty <= 0:
         return jsonify({"error": "Invalid qty"}), 400
-    g.stock += qty
-    db.session.add(StockMovement(grocery_id=g.id, change=qty))
-    db.session.commit()
-    return jsonify({"message": "Added", "data": g.to_dict()})
+    with db.session.begin():
+        g = db.session.execute(
+            update(Grocery).where(Grocery.id == g_id).values(stock=Grocery.stock + qty).returning(*GROCERY_COLUMNS)
+        ).first()
+        if not g:
+            return jsonify({"error": "Not found"}), 404
+        db.session.execute(insert(StockMovement).values(grocery_id=g_id, change=qty))
+    return jsonify({"message": "Added", "data": Grocery.to_dict(g)})
 
 @app.route("/grocery/<int:g_id>/subtract", methods=["POST"])
 def subtract_stock(g_id):
-    g = Grocery.query.get(g_id)
-    if not g:
-        return jsonify({"error": "Not found"}), 404
     qty = int((request.json or {}).get("qty", 0))
     if qty <= 0:
         return jsonify({"error": "Invalid qty"}), 400
-    g.stock = max(0, g.stock - qty)
-    db.session.add(StockMovement(grocery_id=g.id, change=-qty))
-    db.session.commit()
-    return jsonify({"message": "Subtracted", "data": g.to_dict()})
+    with db.session.begin():
+        g = db.session.execute(
+            update(Grocery).where(Grocery.id == g_id).values(stock=func.max(0, Grocery.stock - qty)).returning(*GROCERY_COLUMNS)
+        ).first()
+        if not g:
+            return jsonify({"error": "Not found"}), 404
+        db.session.execute(insert(StockMovement).values(grocery_id=g_id, change=-qty))
+    return jsonify({"message": "Subtracted", "data": Grocery.to_dict(g)})
+
+@app.route("/grocery/<int:g_id>/movements", methods=["POST"])
+def bulk_movements(g_id):
+    data = request.json or []
+    if not isinstance(data, list) or not all(isinstance(m, dict) for m in data):
+        return jsonify({"error": "List of movements required"}), 400
+    changes = [int(m.get("change", 0)) for m in data]
+    if not changes or 0 in changes:
+        return jsonify({"error": "Invalid change"}), 400
+    with db.session.begin():
+        for change in changes:
+            g = db.session.execute(
+                update(Grocery)
+                .where(Grocery.id == g_id)
+                .values(stock=func.max(0, Grocery.stock + change))
+                .returning(*GROCERY_COLUMNS)
+            ).first()
+            if not g:
+                return jsonify({"error": "Not found"}), 404
+        now = datetime.utcnow()
+        db.session.bulk_save_objects(
+            [StockMovement(grocery_id=g_id, change=change, created_at=now) for change in changes]
+        )
+    return jsonify({"message": "Recorded", "count": len(changes), "data": Grocery.to_dict(g)}), 201
 
 @app.route("/alerts", methods=["GET"])
+@etag_cached
 def low_stock_alerts():
-    lows = Grocery.query.filter(Grocery.stock < Grocery.threshold).all()
+    lows = Grocery.query.options(GROCERY_LOAD_ONLY).filter(Grocery.stock - Grocery.threshold < 0).all()
     return jsonify([g.to_dict() for g in lows])
 
 @app.route("/stats/summary", methods=["GET"])
+@etag_cached
 def stats_summary():
-    groceries = Grocery.query.all()
-    total_items = len(groceries)
-    low_items = len([g for g in groceries if g.stock < g.threshold])
-    return jsonify({
-        "total_items": total_items,
-        "low_items": low_items,
-        "in_stock": total_items - low_items,
-        "items": [g.to_dict() for g in groceries]
-    })
+    if request.args.get("detail") != "1":
+        return jsonify(grocery_summary(db.session))
+
+    def head(session):
+        return orjson.dumps(grocery_summary(session), option=app.json.option)[:-1] + b',"items":'
+    groceries = select(Grocery).options(GROCERY_LOAD_ONLY, raiseload("*"))
+    return stream_json_list(groceries, Grocery.to_dict, head=head, tail=b"}")
 
 @app.route("/food", methods=["POST"])
 def create_food():
@@ -212,73 +501,68 @@ def create_food():
     groceries_data = data.get("groceries", [])
     if not name:
         return jsonify({"error": "Name required"}), 400
-    if Food.query.filter_by(name=name).first():
+    try:
+        with db.session.begin():
+            food = Food(name=name, selling_price=selling_price)
+            db.session.add(food)
+            db.session.flush()
+            food_id = food.id
+            recipes = recipe_rows(food_id, groceries_data)
+            if recipes:
+                db.session.execute(insert(FoodRecipe), recipes)
+            compute_food_cost(food_id)
+    except IntegrityError:
         return jsonify({"error": "Food exists"}), 400
-    food = Food(name=name, selling_price=selling_price)
-    db.session.add(food)
-    db.session.commit()
-    for item in groceries_data:
-        g_id = int(item.get("grocery_id") or item.get("id"))
-        qty = float(item.get("quantity", 0.0))
-        if qty <= 0:
-            continue
-        if Grocery.query.get(g_id):
-            db.session.add(FoodRecipe(food_id=food.id, grocery_id=g_id, quantity=qty))
-    db.session.commit()
-    compute_food_cost(food.id)
-    return jsonify({"message": "Created", "data": food.to_dict(include_groceries=True)}), 201
+    return jsonify({"message": "Created", "data": load_food_dict(food_id)}), 201
 
 @app.route("/foods", methods=["GET"])
 def list_foods():
-    foods = Food.query.order_by(Food.created_at.desc()).all()
-    return jsonify([f.to_dict(include_groceries=True) for f in foods])
+    foods = (
+        select(Food)
+        .options(selectinload(Food.recipes).selectinload(FoodRecipe.grocery))
+        .order_by(Food.created_at.desc())
+    )
+    return stream_json_list(foods, lambda f: f.to_dict(include_groceries=True, evict=False))
 
 @app.route("/food/<int:f_id>", methods=["GET"])
 def get_food(f_id):
-    f = Food.query.get(f_id)
-    if not f:
+    food = load_food_dict(f_id)
+    if not food:
         return jsonify({"error": "Not found"}), 404
-    return jsonify(f.to_dict(include_groceries=True))
+    return jsonify(food)
 
 @app.route("/food/<int:f_id>", methods=["PUT"])
 def update_food(f_id):
-    f = Food.query.get(f_id)
-    if not f:
-        return jsonify({"error": "Not found"}), 404
-    data = request.json or {}
-    if "name" in data:
-        new_name = data["name"].strip()
-        if new_name != f.name:
-            if Food.query.filter_by(name=new_name).first():
-                return jsonify({"error": "Food exists"}), 400
-            f.name = new_name
-    if "selling_price" in data:
-        f.selling_price = float(data["selling_price"])
-    db.session.commit()
-    if "groceries" in data:
-        FoodRecipe.query.filter_by(food_id=f.id).delete()
-        db.session.commit()
-        for item in data["groceries"]:
-            g_id = int(item.get("grocery_id") or item.get("id"))
-            qty = float(item.get("quantity", 0.0))
-            if qty <= 0:
-                continue
-            if Grocery.query.get(g_id):
-                db.session.add(FoodRecipe(food_id=f.id, grocery_id=g_id, quantity=qty))
-        db.session.commit()
-        compute_food_cost(f.id)
-    else:
-        compute_food_cost(f.id)
-    return jsonify({"message": "Updated", "data": f.to_dict(include_groceries=True)})
+    try:
+        with db.session.begin():
+            f = Food.query.get(f_id)
+            if not f:
+                return jsonify({"error": "Not found"}), 404
+            data = request.json or {}
+            if "name" in data:
+                f.name = data["name"].strip()
+            if "selling_price" in data:
+                f.selling_price = float(data["selling_price"])
+            if "groceries" in data:
+                db.session.execute(delete(FoodRecipe).where(FoodRecipe.food_id == f.id))
+                recipes = recipe_rows(f.id, data["groceries"])
+                if recipes:
+                    db.session.execute(insert(FoodRecipe), recipes)
+            compute_food_cost(f.id)
+    except IntegrityError:
+        return jsonify({"error": "Food exists"}), 400
+    return jsonify({"message": "Updated", "data": load_food_dict(f_id)})
 
 @app.route("/food/<int:f_id>", methods=["DELETE"])
 def delete_food(f_id):
-    f = Food.query.get(f_id)
-    if not f:
-        return jsonify({"error": "Not found"}), 404
-    FoodRecipe.query.filter_by(food_id=f.id).delete()
-    db.session.delete(f)
-    db.session.commit()
+    with db.session.begin():
+        f = Food.query.get(f_id)
+        if not f:
+            return jsonify({"error": "Not found"}), 404
+        FoodRecipe.query.filter_by(food_id=f.id).delete()
+        db.session.delete(f)
+    with food_cache_lock:
+        food_cache.pop(f_id, None)
     return jsonify({"message": "Deleted"})
 
 @app.route("/predict/prophet", methods=["GET"])